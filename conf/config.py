@@ -3,6 +3,7 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     sqlalchemy_database_url: str
+    secret_key: str
     algorithm: str
     mail_username: str
     mail_password: str
@@ -14,6 +15,9 @@ class Settings(BaseSettings):
     cloudinary_name: str
     cloudinary_api_key: str
     cloudinary_api_secret: str
+    uvicorn_workers: int = 4
+    threadpool_size: int = 100
+    debug: bool = False
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,12 @@
+import redis.asyncio as redis
+
+from conf.config import settings
+
+pool = redis.BlockingConnectionPool(host=settings.redis_host,
+                                    port=settings.redis_port,
+                                    db=0,
+                                    encoding="utf-8",
+                                    decode_responses=True,
+                                    max_connections=50,
+                                    timeout=5)
+redis_client = redis.Redis.from_pool(pool)
@@ -1,25 +1,24 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from conf.config import settings
 
 SQLALCHEMY_DATABASE_URL = settings.sqlalchemy_database_url
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
+engine = create_async_engine(SQLALCHEMY_DATABASE_URL,
+                             query_cache_size=1200,
+                             pool_size=20,
+                             max_overflow=0,
+                             pool_pre_ping=True)
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
-def get_db():
+async def get_db():
 
     """
-    The get_db function is a context manager that returns the database session.
+    The get_db function is a context manager that returns the async database session.
     It also ensures that the connection to the database is closed after each request.
 
-    :return: A database session, which is used to query the database
+    :return: An async database session, which is used to query the database
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
@@ -1,4 +1,4 @@
-from sqlalchemy import String, Text, Column, Integer, Date, UniqueConstraint, DateTime, func, ForeignKey, Boolean
+from sqlalchemy import String, Text, Column, Integer, Date, DateTime, func, ForeignKey, Boolean, Index, extract
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -7,16 +7,21 @@ Base = declarative_base()
 
 class Contact(Base):
     __tablename__ = "contacts"
-    __table_args__ = (UniqueConstraint("email", "phone", "user_id", name="unique_contact_user"),)
     id = Column(Integer, primary_key=True, autoincrement=True)
     first_name = Column(String(50), nullable=False)
     last_name = Column(String(50), nullable=False)
-    email = Column(String(20))
-    phone = Column(String(20), nullable=False)
+    email = Column(String(254))
+    phone = Column(String(32), nullable=False)
     date_of_birth = Column(Date)
     additional_data = Column(Text)
     user_id = Column("user_id", ForeignKey("users.id", ondelete="CASCADE"), default=None)
-    user = relationship("User", backref="contacts")
+    user = relationship("User", back_populates="contacts", lazy="raise")
+    __table_args__ = (
+        Index("ix_contacts_user_name", "user_id", "last_name", "first_name"),
+        Index("ix_contacts_user_email", "user_id", "email", unique=True),
+        Index("ix_contacts_user_phone", "user_id", "phone", unique=True),
+        Index("ix_contacts_user_dob_mmdd", "user_id", extract("month", date_of_birth), extract("day", date_of_birth)),
+    )
 
 
 class User(Base):
@@ -29,3 +34,4 @@ class User(Base):
     avatar = Column(String(255), nullable=True)
     refresh_token = Column(String(255), nullable=True)
     confirmed = Column(Boolean, default=False)
+    contacts = relationship("Contact", back_populates="user", lazy="raise")
@@ -1,13 +1,54 @@
-import redis.asyncio as redis
+import atexit
+import logging
+import queue
+from contextlib import asynccontextmanager
+from logging.handlers import QueueHandler, QueueListener
+
 import uvicorn
+from anyio import to_thread
 from fastapi import FastAPI
-from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
 
 from conf.config import settings
+from database.cache import redis_client
+from database.db import engine
 from routes import contacts, auth, users
+from services.debug import install_query_counter
+from services.email import smtp_pool
+
+# Log records are written to stderr by a listener thread, so logging never blocks the event loop.
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(level=logging.INFO, handlers=[QueueHandler(log_queue)])
+log_listener.start()
+atexit.register(log_listener.stop)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+
+    """
+    The lifespan function runs once per worker. On startup it keeps the pooled Redis client and the database engine
+    on app.state for reuse by other modules and widens the threadpool used for blocking calls.
+    On shutdown it closes the Redis pool, disposes the database connection pool and closes the pooled SMTP
+    connections; each step runs even if an earlier one fails.
+
+    :param app: FastAPI: The application instance
+    """
+    app.state.redis = redis_client
+    app.state.engine = engine
+    to_thread.current_default_thread_limiter().total_tokens = settings.threadpool_size
+    yield
+    try:
+        await app.state.redis.aclose()
+    finally:
+        try:
+            await app.state.engine.dispose()
+        finally:
+            await smtp_pool.close()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.include_router(auth.router, prefix="/api")
 app.include_router(contacts.router, prefix="/api")
@@ -23,21 +64,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
-@app.on_event("startup")
-async def startup():
-
-    """
-    The startup function is called when the application starts up and connects to Redis server defined in settings for rate limiting initialization.
-
-    """
-    r = await redis.Redis(host=settings.redis_host,
-                          port=settings.redis_port,
-                          db=0,
-                          encoding="utf-8",
-                          decode_responses=True)
-    await FastAPILimiter.init(r)
+if settings.debug:
+    install_query_counter(app, engine)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=6500)
+    uvicorn.run("main:app", host="0.0.0.0", port=6500, workers=settings.uvicorn_workers, loop="auto", http="auto")
@@ -1,11 +1,62 @@
 from datetime import datetime, timedelta
+from itertools import product
 from typing import List
-from sqlalchemy import extract, and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import extract, and_, select, tuple_, bindparam, update, delete, Select, RowMapping
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from database.models import Contact, User
 from schemas import ContactBase
 
 
+CONTACT_RESPONSE_COLUMNS = (Contact.id, Contact.first_name, Contact.last_name, Contact.email, Contact.phone,
+                            Contact.date_of_birth, Contact.additional_data)
+CONTACT_BY_ID = select(Contact).where(
+    and_(Contact.id == bindparam("contact_id"), Contact.user_id == bindparam("user_id")))
+CONTACTS_BY_BIRTHDAY = select(Contact).where(
+    Contact.user_id == bindparam("user_id"),
+    tuple_(extract("month", Contact.date_of_birth), extract("day", Contact.date_of_birth))
+    .in_(bindparam("pairs", expanding=True))
+).offset(bindparam("skip")).limit(bindparam("limit"))
+# user_id is a column of contacts, so UPDATE reserves that bind name; the owner is bound as owner_id instead.
+CONTACT_UPDATE = update(Contact).where(
+    and_(Contact.id == bindparam("contact_id"), Contact.user_id == bindparam("owner_id"))
+).values(first_name=bindparam("first_name"),
+         last_name=bindparam("last_name"),
+         email=bindparam("email"),
+         phone=bindparam("phone"),
+         date_of_birth=bindparam("date_of_birth"),
+         additional_data=bindparam("additional_data")
+         ).returning(Contact)
+CONTACT_DELETE = delete(Contact).where(
+    and_(Contact.id == bindparam("contact_id"), Contact.user_id == bindparam("user_id"))
+).returning(Contact)
+
+
+def contacts_filter_statement(by_first_name: bool, by_last_name: bool, by_email: bool) -> Select:
+
+    """
+    The contacts_filter_statement function builds the select statement of user's contacts for one combination of filters.
+        Filter values, skip and limit are bind parameters, so the statement can be reused for every request.
+        Only the columns returned by the API are selected.
+
+    :param by_first_name: bool: Filter the contacts by first name
+    :param by_last_name: bool: Filter the contacts by last name
+    :param by_email: bool: Filter the contacts by email
+    :return: A select statement
+    """
+    stmt = select(*CONTACT_RESPONSE_COLUMNS).where(Contact.user_id == bindparam("user_id"))
+    if by_first_name:
+        stmt = stmt.where(Contact.first_name == bindparam("first_name"))
+    if by_last_name:
+        stmt = stmt.where(Contact.last_name == bindparam("last_name"))
+    if by_email:
+        stmt = stmt.where(Contact.email == bindparam("email"))
+    return stmt.offset(bindparam("skip")).limit(bindparam("limit"))
+
+
+CONTACTS_BY_FILTERS = {filters: contacts_filter_statement(*filters) for filters in product((False, True), repeat=3)}
+
+
 async def get_contacts(
         first_name: str | None,
         last_name: str | None,
@@ -13,8 +64,8 @@ async def get_contacts(
         skip: int,
         limit: int,
         user: User,
-        db: Session
-) -> List[Contact]:
+        db: AsyncSession
+) -> List[RowMapping]:
     """
     The get_contacts function returns a list of contacts that match the given parameters.
 
@@ -24,78 +75,62 @@ async def get_contacts(
     :param skip: int: Skip a number of records
     :param limit: int: Limit the number of results returned
     :param user: User: Get the user id from the current logged in user
-    :param db: Session: Pass the database session to the function.
-    :return: A list of matching contacts
+    :param db: AsyncSession: Pass the database session to the function.
+    :return: A list of matching contacts as mappings of the response columns
     """
-    query = db.query(Contact).filter(Contact.user_id == user.id)
-
-    filter_conditions = []
+    stmt = CONTACTS_BY_FILTERS[(first_name is not None, last_name is not None, email is not None)]
+    params = {"user_id": user.id, "skip": skip, "limit": limit}
     if first_name is not None:
-        filter_conditions.append(Contact.first_name == first_name)
+        params["first_name"] = first_name
     if last_name is not None:
-        filter_conditions.append(Contact.last_name == last_name)
+        params["last_name"] = last_name
     if email is not None:
-        filter_conditions.append(Contact.email == email)
-
-    if filter_conditions:
-        query = query.filter(*filter_conditions)
+        params["email"] = email
+    result = await db.execute(stmt, params)
+    return result.mappings().all()
 
-    return query.offset(skip).limit(limit).all()
 
-
-async def get_contact(contact_id: int, user: User, db: Session) -> Contact:
+async def get_contact(contact_id: int, user: User, db: AsyncSession) -> Contact:
 
     """
     The get_contact function takes in a contact_id and returns the contact with that id from database.
 
     :param contact_id: int: Identify the contact to be retrieved
     :param user: User: Get the user id from the current logged in user
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :return: The contact with the given id
     """
-    return db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
+    result = await db.execute(CONTACT_BY_ID, {"contact_id": contact_id, "user_id": user.id})
+    return result.scalars().first()
 
 
-async def create_contact(body: ContactBase, user: User, db: Session) -> Contact:
+async def create_contact(body: ContactBase, user: User, db: AsyncSession) -> Contact | None:
 
     """
     The create_contact function creates a new contact in the database.
+        The insert is skipped by the database when the user already has a contact with the same email or phone,
+        so the duplicate check and the insert take a single round-trip.
 
     :param body: ContactBase: Pass the contact data from the request body to create_contact
     :param user: User: Get the user id from the current logged in user
-    :param db: Session: Access the database
-    :return: A contact object
+    :param db: AsyncSession: Access the database
+    :return: A contact object or none if the email or phone number is already in database
     """
-    contact = Contact(first_name=body.first_name,
-                      last_name=body.last_name,
-                      email=body.email,
-                      phone=body.phone,
-                      date_of_birth=body.date_of_birth,
-                      additional_data=body.additional_data,
-                      user_id=user.id
-                      )
-    db.add(contact)
-    db.commit()
-    db.refresh(contact)
+    stmt = insert(Contact).values(first_name=body.first_name,
+                                  last_name=body.last_name,
+                                  email=body.email,
+                                  phone=body.phone,
+                                  date_of_birth=body.date_of_birth,
+                                  additional_data=body.additional_data,
+                                  user_id=user.id
+                                  ).on_conflict_do_nothing().returning(Contact)
+    result = await db.execute(stmt)
+    contact = result.scalars().first()
+    await db.commit()
     return contact
 
 
-async def check_contact(email: str, phone: str, user: User, db: Session) -> Contact:
-
-    """
-    The check_contact function checks if a contact already exists in the database.
-
-    :param email: str: Check if the email is already in use by another user
-    :param phone: str: Check if the phone number is already in the database
-    :param user: User: Get the user id from the current logged in user
-    :param db: Session: Pass the database session to the function
-    :return: A contact object if the email or phone number is already in database
-    """
-    return db.query(Contact).filter(
-        and_(Contact.user_id == user.id, or_(Contact.email == email, Contact.phone == phone))).first()
-
-
-async def update_contact(contact_id: int, body: ContactBase, user: User, db: Session) -> Contact | None:
+async def update_contact(contact_id: int, body: ContactBase, user: User, db: AsyncSession) -> Contact | None:
 
     """
     The update_contact function takes in a contact_id and updates the contact in the database.
@@ -103,39 +138,39 @@ async def update_contact(contact_id: int, body: ContactBase, user: User, db: Ses
     :param contact_id: int: Identify which contact to update
     :param body: ContactBase: Pass the data from the request body to this function
     :param user: User: Get the user id from the current logged in user
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: The updated contact or none if no contact was found
     """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
-    if contact:
-        contact.first_name = body.first_name
-        contact.last_name = body.last_name
-        contact.email = body.email
-        contact.phone = body.phone
-        contact.date_of_birth = body.date_of_birth
-        contact.additional_data = body.additional_data
-        db.commit()
+    result = await db.execute(CONTACT_UPDATE, {"contact_id": contact_id,
+                                               "owner_id": user.id,
+                                               "first_name": body.first_name,
+                                               "last_name": body.last_name,
+                                               "email": body.email,
+                                               "phone": body.phone,
+                                               "date_of_birth": body.date_of_birth,
+                                               "additional_data": body.additional_data})
+    contact = result.scalars().first()
+    await db.commit()
     return contact
 
 
-async def remove_contact(contact_id: int, user: User, db: Session) -> Contact | None:
+async def remove_contact(contact_id: int, user: User, db: AsyncSession) -> Contact | None:
 
     """
     The remove_contact function removes a contact from the database.
 
     :param contact_id: int: Specify the id of the contact to be removed
     :param user: User: Get the user id from the current logged in user
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :return: The contact that was removed
     """
-    contact = db.query(Contact).filter(and_(Contact.id == contact_id, Contact.user_id == user.id)).first()
-    if contact:
-        db.delete(contact)
-        db.commit()
+    result = await db.execute(CONTACT_DELETE, {"contact_id": contact_id, "user_id": user.id})
+    contact = result.scalars().first()
+    await db.commit()
     return contact
 
 
-async def birthdays_in_7_days(skip: int, limit: int, user: User, db: Session) -> List[Contact]:
+async def birthdays_in_7_days(skip: int, limit: int, user: User, db: AsyncSession) -> List[Contact]:
 
     """
     The birthdays_in_7_days function returns a list of contacts whose birthdays are within the next 7 days.
@@ -144,29 +179,14 @@ async def birthdays_in_7_days(skip: int, limit: int, user: User, db: Session) ->
     :param skip: int: Skip a number of records from the database
     :param limit: int: Limit the number of results returned
     :param user: User is the current logged in user who's contacts will be returned.
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :return: A list of contacts whose birthday is within the next 7 days
     """
     today_date = datetime.now().date()
-    end_date = today_date + timedelta(days=7)
-
-    if today_date.month == end_date.month:
-        results = db.query(Contact).filter(
-            and_(Contact.user_id == user.id, (
-                    (extract("month", Contact.date_of_birth) == today_date.month) &
-                    (extract("day", Contact.date_of_birth) >= today_date.day) &
-                    (extract("day", Contact.date_of_birth) <= end_date.day))
-                 )
-        ).offset(skip).limit(limit).all()
-    else:
-        results = db.query(Contact).filter(
-            and_(Contact.user_id == user.id, (
-                    (extract("month", Contact.date_of_birth) == end_date.month) &
-                    (extract("day", Contact.date_of_birth) <= end_date.day)
-                    | (
-                            (extract("month", Contact.date_of_birth) == today_date.month) &
-                            (extract("day", Contact.date_of_birth) >= today_date.day))
-            )
-                 )
-        ).offset(skip).limit(limit).all()
-    return results
+    days = [today_date + timedelta(days=i) for i in range(8)]
+    pairs = [(day.month, day.day) for day in days]
+    if (2, 29) not in pairs and (2, 28) in pairs and (3, 1) in pairs:
+        pairs.append((2, 29))
+
+    result = await db.execute(CONTACTS_BY_BIRTHDAY, {"user_id": user.id, "pairs": pairs, "skip": skip, "limit": limit})
+    return result.scalars().all()
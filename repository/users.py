@@ -1,82 +1,185 @@
-from libgravatar import Gravatar
-from sqlalchemy.orm import Session
+import hashlib
+import json
+import logging
+from datetime import datetime
 
+from redis.exceptions import RedisError
+from sqlalchemy import select, bindparam, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from database.cache import redis_client
 from database.models import User
 from schemas import UserModel
 
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+USER_CACHE_TTL = 300
+USER_CACHE_EXCLUDED = ("password", "refresh_token")
+
+logger = logging.getLogger(__name__)
+
+
+def user_cache_key(email: str) -> str:
+
+    """
+    The user_cache_key function returns the Redis key under which the user with given email is cached.
+
+    :param email: str: Email of the cached user
+    :return: The Redis key
+    """
+    return f"user:{email}"
+
+
+def user_to_dict(user: User) -> dict:
+
+    """
+    The user_to_dict function converts the column attributes of a user into a JSON serializable dictionary.
+    The password hash and the refresh token are left out, so they are never stored in Redis.
+
+    :param user: User: The user to serialize
+    :return: A dictionary with the user's column values
+    """
+    data = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs
+            if attr.key not in USER_CACHE_EXCLUDED}
+    if data["created_at"] is not None:
+        data["created_at"] = data["created_at"].isoformat()
+    return data
+
+
+def gravatar_url(email: str) -> str:
+
+    """
+    The gravatar_url function builds the Gravatar image url for the given email.
+        The url is derived from the md5 hash of the normalized email, so no request to Gravatar is needed.
+
+    :param email: str: Email of the user
+    :return: The url of the user's Gravatar image
+    """
+    email_hash = hashlib.md5(email.strip().lower().encode("utf-8")).hexdigest()
+    return f"https://www.gravatar.com/avatar/{email_hash}"
+
+
+async def user_from_dict(data: dict, db: AsyncSession) -> User:
+
+    """
+    The user_from_dict function rebuilds a cached user and attaches it to the session without a query,
+    so that changes made to it are still saved by db.commit().
+
+    :param data: dict: The user's column values as returned by user_to_dict
+    :param db: AsyncSession: Pass the database session to the function
+    :return: The user object bound to the session
+    """
+    if data["created_at"] is not None:
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+    user = User(**data)
+    make_transient_to_detached(user)
+    return await db.merge(user, load=False)
+
 
-async def get_user_by_email(email: str, db: Session) -> User:
+async def drop_cached_user(email: str) -> None:
+
+    """
+    The drop_cached_user function removes the cached copy of the user with given email.
+    A Redis failure is logged and ignored, the cached copy then expires after USER_CACHE_TTL.
+
+    :param email: str: Email of the cached user
+    """
+    try:
+        await redis_client.delete(user_cache_key(email))
+    except RedisError as e:
+        logger.warning("Could not drop cached user %s: %s", email, e)
+
+
+async def get_user_by_email(email: str, db: AsyncSession, use_cache: bool = True) -> User:
 
     """
     The get_user_by_email function returns the user with that email. If no such user exists, it returns None.
+    A user served from the cache has no password and refresh_token loaded, so login and token refresh
+    pass use_cache=False to read them from the database. If Redis is unavailable, the database is used.
 
     :param email: str: Pass in the email address of the user you want to get from the database
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
+    :param use_cache: bool: Look the user up in Redis before querying the database
     :return: The user with the given email
     """
-    return db.query(User).filter(User.email == email).first()
+    key = user_cache_key(email)
+    if use_cache:
+        try:
+            raw = await redis_client.get(key)
+        except RedisError as e:
+            logger.warning("Could not read cached user %s: %s", email, e)
+            raw = None
+        if raw:
+            return await user_from_dict(json.loads(raw), db)
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
+    user = result.scalars().first()
+    if user and use_cache:
+        try:
+            await redis_client.setex(key, USER_CACHE_TTL, json.dumps(user_to_dict(user)))
+        except RedisError as e:
+            logger.warning("Could not cache user %s: %s", email, e)
+    return user
 
 
-async def create_user(body: UserModel, db: Session) -> User:
+async def create_user(body: UserModel, db: AsyncSession) -> User:
 
     """
     The create_user function creates a new user in the database with parameters include in UserModel.
 
     :param body: UserModel: Pass the user data to the database
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :return: A user object
     """
-    avatar = None
-    try:
-        g = Gravatar(body.email)
-        avatar = g.get_image()
-    except Exception as e:
-        print(e)
+    avatar = gravatar_url(body.email)
     new_user = User(**body.dict(), avatar=avatar)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await drop_cached_user(new_user.email)
+    await db.refresh(new_user)
     return new_user
 
 
-async def update_token(user: User, token: str | None, db: Session) -> None:
+async def update_token(user: User, token: str | None, db: AsyncSession) -> None:
 
     """
     The update_token function updates the refresh token for a user in the database.
 
     :param user: User: Identify the user that is being updated
     :param token: str | None: Set the refresh token for a user
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     """
     user.refresh_token = token
-    db.commit()
+    await db.commit()
+    await drop_cached_user(user.email)
 
 
-async def confirm_email(email: str, db: Session) -> None:
+async def confirm_email(email: str, db: AsyncSession) -> None:
 
     """
     The confirm_email function takes in an email and a database session,
     and sets the confirmed field of the user with that email to True.
 
     :param email: str: Get the user's email address
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     """
     user = await get_user_by_email(email, db)
     user.confirmed = True
-    db.commit()
+    await db.commit()
+    await drop_cached_user(email)
 
 
-async def update_avatar(email, url: str, db: Session) -> User:
+async def update_avatar(email, url: str, db: AsyncSession) -> User:
 
     """
     The update_avatar function updates the avatar of a user in the database.
 
     :param email: Pass the email of the user for whom the avatar will be changed
     :param url: str: Pass in the url of the avatar image
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :return: The updated user object
     """
     user = await get_user_by_email(email, db)
     user.avatar = url
-    db.commit()
+    await db.commit()
+    await drop_cached_user(email)
     return user
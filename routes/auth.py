@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Security, BackgroundTasks, Request
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.db import get_db
 from schemas import UserModel, UserResponse, TokenModel, RequestEmail
@@ -17,7 +17,7 @@ async def signup(
         body: UserModel,
         background_tasks: BackgroundTasks,
         request: Request,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_db)
 ):
 
     """
@@ -29,20 +29,20 @@ async def signup(
     :param body: UserModel: Get the user's information from the request body
     :param background_tasks: BackgroundTasks: Add a task to the background queue
     :param request: Request: Get the base url of the application
-    :param db: Session: Get the database session
+    :param db: AsyncSession: Get the database session
     :return: A dict with the user and a message
     """
     exist_user = await repository_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.aget_password_hash(body.password)
     new_user = await repository_users.create_user(body, db)
     background_tasks.add_task(send_email, new_user.email, new_user.username, request.base_url)
     return {"user": new_user, "detail": "User successfully created. Check your email for confirmation."}
 
 
 @router.post("/login", response_model=TokenModel)
-async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
 
     """
     The login function is used to authenticate a user.
@@ -50,15 +50,15 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
         The access token can be used to make requests on behalf of that user.
 
     :param body: OAuth2PasswordRequestForm: Get the username and password from the request body
-    :param db: Session: Get the database session
+    :param db: AsyncSession: Get the database session
     :return: A dictionary with the access token, refresh token and a bearer type
     """
-    user = await repository_users.get_user_by_email(body.username, db)
+    user = await repository_users.get_user_by_email(body.username, db, use_cache=False)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email")
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
-    if not auth_service.verify_password(body.password, user.password):
+    if not await auth_service.averify_password(body.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password")
 
     access_token = await auth_service.create_access_token(data={"sub": user.email})
@@ -68,18 +68,18 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: Session = Depen
 
 
 @router.get("/refresh_token", response_model=TokenModel)
-async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: Session = Depends(get_db)):
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(security), db: AsyncSession = Depends(get_db)):
 
     """
     The refresh_token function takes in a refresh token to update the access token and create new refresh token.
 
     :param credentials: HTTPAuthorizationCredentials: Pass in the credentials from the request header
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: A new access token and refresh token
     """
     token = credentials.credentials
     email = await auth_service.decode_refresh_token(token)
-    user = await repository_users.get_user_by_email(email, db)
+    user = await repository_users.get_user_by_email(email, db, use_cache=False)
     if user.refresh_token != token:
         await repository_users.update_token(user, None, db)
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
@@ -91,7 +91,7 @@ async def refresh_token(credentials: HTTPAuthorizationCredentials = Security(sec
 
 
 @router.get("/confirm_email/{token}")
-async def confirm_email(token: str, db: Session = Depends(get_db)):
+async def confirm_email(token: str, db: AsyncSession = Depends(get_db)):
 
     """
     The confirm_email function is used to confirm a user's email address.
@@ -101,7 +101,7 @@ async def confirm_email(token: str, db: Session = Depends(get_db)):
         Otherwise, we use our repository_users function confirm_email() which sets the confirmed field of that particular user in our database as True.
 
     :param token: str: Get the token from the url
-    :param db: Session: Get the database session
+    :param db: AsyncSession: Get the database session
     :return: A message saying that the email has been confirmed
     """
     email = await auth_service.get_email_from_token(token)
@@ -116,7 +116,7 @@ async def confirm_email(token: str, db: Session = Depends(get_db)):
 
 @router.post("/request_email")
 async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
-                        db: Session = Depends(get_db)):
+                        db: AsyncSession = Depends(get_db)):
 
     """
     The request_email function is used to send an email to the user with a link that will allow them
@@ -125,15 +125,16 @@ async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, r
     address, and returns an error message if so. If not, it sends an email containing a confirmation link.
 
     :param body: RequestEmail: Get the email from the request body
-    :param background_tasks: BackgroundTasks: Run the send_email function in a background thread
+    :param background_tasks: BackgroundTasks: Send the confirmation email after the response is returned
     :param request: Request: Get the base url of the server
-    :param db: Session: Access the database
+    :param db: AsyncSession: Access the database
     :return: A message if the user is confirmed or not
     """
     user = await repository_users.get_user_by_email(body.email, db)
 
+    if user is None:
+        return {"message": "Check your email for confirmation."}
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
-    if user:
-        background_tasks.add_task(send_email, user.email, user.username, request.base_url)
+    background_tasks.add_task(send_email, user.email, user.username, request.base_url)
     return {"message": "Check your email for confirmation."}
@@ -1,24 +1,49 @@
+import logging
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi_limiter.depends import RateLimiter
-
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, status, Response
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from database.cache import redis_client
 from database.db import get_db
 from database.models import User
 from schemas import ContactBase, ContactResponse
 from repository import contacts as repository_contacts
 from services.auth import auth_service
+from services.limiter import UserRateLimiter
 
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+CONTACTS_CACHE_TTL = 60
+contact_list_adapter = TypeAdapter(List[ContactResponse])
+
+logger = logging.getLogger(__name__)
+
+
+async def invalidate_contacts_cache(user_id: int) -> None:
+
+    """
+    The invalidate_contacts_cache function makes all cached pages of the user's contact list unreachable.
+        Every cached page key contains the user's cache generation, so bumping the generation with a single INCR
+        retires all of them at once; the old pages simply expire after CONTACTS_CACHE_TTL.
+        A Redis failure is logged and ignored, so a committed change is still reported as successful.
+
+    :param user_id: int: Id of the user whose contacts were changed
+    """
+    try:
+        await redis_client.incr(f"contacts:{user_id}:gen")
+    except RedisError as e:
+        logger.warning("Could not invalidate cached contacts of user %s: %s", user_id, e)
+
 
 @router.get("/birthday", response_model=List[ContactResponse])
 async def read_contacts_with_birthday(
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
 
@@ -27,7 +52,7 @@ async def read_contacts_with_birthday(
 
     :param skip: int: Skip a number of records in the database
     :param limit: int: Limit the number of contacts returned
-    :param db: Session: Pass the database session to the function
+    :param db: AsyncSession: Pass the database session to the function
     :param current_user: User: Get the current user from the auth_service
     :return: A list of contacts
     """
@@ -42,30 +67,50 @@ async def read_contacts(
         email: str = None,
         skip: int = 0,
         limit: int = 100,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
 
     """
     The read_contacts function returns the list of user's all contacts.
+        Unfiltered pages are cached in Redis; if Redis is unavailable, the contacts are read from the database.
 
     :param first_name: str: Specify the first name of the contact to be retrieved
     :param last_name: str: Filter the contacts by last name
     :param email: str: Filter the contacts by email
     :param skip: int: Skip the first n contacts
     :param limit: int: Limit the number of contacts returned
-    :param db: Session: Pass the database session to the repository layer
+    :param db: AsyncSession: Pass the database session to the repository layer
     :param current_user: User: Get the user object of the currently logged-in user
     :return: A list of contacts
     """
-    contacts = await repository_contacts.get_contacts(first_name, last_name, email, skip, limit, current_user, db)
-    return contacts
+    if first_name is not None or last_name is not None or email is not None:
+        return await repository_contacts.get_contacts(first_name, last_name, email, skip, limit, current_user, db)
+
+    try:
+        generation = await redis_client.get(f"contacts:{current_user.id}:gen") or 0
+        key = f"contacts:{current_user.id}:{generation}:{skip}:{limit}"
+        cached = await redis_client.get(key)
+    except RedisError as e:
+        logger.warning("Could not read cached contacts of user %s: %s", current_user.id, e)
+        key = cached = None
+    if cached:
+        return Response(content=cached, media_type="application/json")
+
+    contacts = await repository_contacts.get_contacts(None, None, None, skip, limit, current_user, db)
+    body = contact_list_adapter.dump_json(contact_list_adapter.validate_python(contacts, from_attributes=True))
+    if key is not None:
+        try:
+            await redis_client.setex(key, CONTACTS_CACHE_TTL, body)
+        except RedisError as e:
+            logger.warning("Could not cache contacts of user %s: %s", current_user.id, e)
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/{contact_id}", response_model=ContactResponse)
 async def read_contact(
         contact_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
 
@@ -73,7 +118,7 @@ async def read_contact(
     The read_contact function will return a contact by its id.
 
     :param contact_id: int: Specify the contact id to be used in the function
-    :param db: Session: Get a database session
+    :param db: AsyncSession: Get a database session
     :param current_user: User: Get the user object of the currently logged-in user
     :return: A contact object
     """
@@ -83,10 +128,10 @@ async def read_contact(
     return contact
 
 
-@router.post("/", response_model=ContactBase, dependencies=[Depends(RateLimiter(times=1, seconds=10))], status_code=status.HTTP_201_CREATED)
+@router.post("/", response_model=ContactBase, dependencies=[Depends(UserRateLimiter(times=1, seconds=10, scope="contacts"))], status_code=status.HTTP_201_CREATED)
 async def create_contact(
         body: ContactBase,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
 
@@ -94,21 +139,22 @@ async def create_contact(
     The create_contact function creates a new contact in the database.
 
     :param body: ContactBase: Get the data from the request body
-    :param db: Session: Get the database session
+    :param db: AsyncSession: Get the database session
     :param current_user: User: Get the user object of the currently logged-in user
     :return: A contactbase object
     """
-    exist_contact = await repository_contacts.check_contact(body.email, body.phone, current_user, db)
-    if exist_contact:
+    contact = await repository_contacts.create_contact(body, current_user, db)
+    if contact is None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email or phone number exists.")
-    return await repository_contacts.create_contact(body, current_user, db)
+    await invalidate_contacts_cache(current_user.id)
+    return contact
 
 
 @router.put("/{contact_id}", response_model=ContactResponse)
 async def update_contact(
         body: ContactBase,
         contact_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
 
@@ -117,20 +163,24 @@ async def update_contact(
 
     :param body: ContactBase: Get the data from the request body
     :param contact_id: int: Specify the contact that will be deleted
-    :param db: Session: Get a database session
+    :param db: AsyncSession: Get a database session
     :param current_user: User: Get the user object of the currently logged-in user
     :return: A contact object
     """
-    contact = await repository_contacts.update_contact(contact_id, body, current_user, db)
+    try:
+        contact = await repository_contacts.update_contact(contact_id, body, current_user, db)
+    except IntegrityError:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email or phone number exists.")
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+    await invalidate_contacts_cache(current_user.id)
     return contact
 
 
 @router.delete("/{contact_id}", response_model=ContactResponse)
 async def remove_contact(
         contact_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_db),
         current_user: User = Depends(auth_service.get_current_user)
 ):
 
@@ -138,11 +188,12 @@ async def remove_contact(
     The remove_contact function takes in a contact_id and removes the contact from the database.
 
     :param contact_id: int: Identify the contact to be removed
-    :param db: Session: Get the database session
+    :param db: AsyncSession: Get the database session
     :param current_user: User: Get the user object of the currently logged-in user
     :return: The contact that was removed
     """
     contact = await repository_contacts.remove_contact(contact_id, current_user, db)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Contact not found")
+    await invalidate_contacts_cache(current_user.id)
     return contact
@@ -2,11 +2,13 @@ from datetime import date, datetime
 
 from pydantic import BaseModel, Field
 
+EMAIL_PATTERN = r"^[a-zA-Z0-9._-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$"
+
 
 class ContactBase(BaseModel):
     first_name: str = Field(max_length=50)
     last_name: str = Field(max_length=50)
-    email: str = Field(max_length=20, pattern=r"^[a-zA-Z0-9._-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$")
+    email: str = Field(max_length=254, pattern=EMAIL_PATTERN)
     phone: str = Field(min_length=7, max_length=20)
     date_of_birth: date
     additional_data: str = None
@@ -21,14 +23,14 @@ class ContactResponse(ContactBase):
 
 class UserModel(BaseModel):
     username: str = Field(min_length=5, max_length=16)
-    email: str = Field(max_length=20, pattern=r"^[a-zA-Z0-9._-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$")
+    email: str = Field(max_length=20, pattern=EMAIL_PATTERN)
     password: str = Field(min_length=6, max_length=10)
 
 
 class UserDb(BaseModel):
     id: int
     username: str
-    email: str = Field(max_length=20, pattern=r"^[a-zA-Z0-9._-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}$")
+    email: str = Field(max_length=20, pattern=EMAIL_PATTERN)
     created_at: datetime
     avatar: str
 
@@ -1,135 +1,216 @@
-import string
+import hashlib
+import logging
+import os
+import orjson
+import secrets
+import time
+from types import SimpleNamespace
 from typing import Optional
-from jose import JWTError, jwt
+from anyio import CapacityLimiter, to_thread
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
+from cachetools import TTLCache
+from jose import JWTError, jwt, jwk, jws
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
 from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
-from random import choice
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from conf.config import settings
 from database.db import get_db
 from repository import users as repository_users
 
+logger = logging.getLogger(__name__)
 
-class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    SECRET_KEY = "".join(choice(string.ascii_letters) for _ in range(50))
-    ALGORITHM = settings.algorithm
-    oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
-
-    def verify_password(self, plain_password, hashed_password):
-
-        """
-        The verify_password function takes a plain-text password and a hashed password as arguments.
-        It then uses the pwd_context object to verify that the plain-text password matches the hashed
-        password.
-
-        :param self: Make the function a method of the user class
-        :param plain_password: Store the password that is entered by the user
-        :param hashed_password: Compare the hashed password stored in the database to a plain text password
-        :return: True or false
-        """
-        return self.pwd_context.verify(plain_password, hashed_password)
-
-    def get_password_hash(self, password: str):
-
-        """
-        The get_password_hash function takes a password as an argument and returns the hashed version of that password.
-        The hash is generated using the pwd_context object's hash method, which uses bcrypt to generate a secure hash.
-
-        :param self: Make the function a method of the user class
-        :param password: str: Pass in the password that is to be hashed
-        :return: A hashed password
-        """
-        return self.pwd_context.hash(password)
-
-    async def create_access_token(self, data: dict, expires_delta: Optional[float] = None):
-
-        """
-        The create_access_token function creates a new access token for the user.
-            Args:
-                data (dict): A dictionary containing the user's information.
-                expires_delta (Optional[float]): The time in seconds until the token expires. Defaults to 15 minutes if not specified.
-
-        :param self: Represent the instance of the class
-        :param data: dict: Pass the data that will be encoded into the access token
-        :param expires_delta: Optional[float]: Set the expiration time of the token
-        :return: A jwt token
-        """
-        to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.utcnow() + timedelta(seconds=expires_delta)
-        else:
-            expire = datetime.utcnow() + timedelta(minutes=15)
-        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "access_token"})
-        encoded_access_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
-        return encoded_access_token
-
-    async def create_refresh_token(self, data: dict, expires_delta: Optional[float] = None):
-
-        """
-        The create_refresh_token function creates a refresh token for the user.
-            Args:
-                data (dict): A dictionary containing the user's id and username.
-                expires_delta (Optional[float]): The number of seconds until the refresh token expires. Defaults to None, which sets it to 7 days from now.
-
-        :param self: Represent the instance of the class
-        :param data: dict: Pass the user's id and username to the function
-        :param expires_delta: Optional[float]: Set the expiration time of the refresh token
-        :return: An encoded refresh token
-        """
-        to_encode = data.copy()
-        if expires_delta:
-            expire = datetime.utcnow() + timedelta(seconds=expires_delta)
-        else:
-            expire = datetime.utcnow() + timedelta(days=7)
-        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "refresh_token"})
-        encoded_refresh_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
-        return encoded_refresh_token
-
-    async def decode_refresh_token(self, refresh_token: str):
-
-        """
-        The decode_refresh_token function takes a refresh token and decodes it using the SECRET_KEY.
-        If the scope is &quot;refresh_token&quot;, then we return the email address of that user. If not, we raise an HTTPException with status code 401 (Unauthorized) and detail message &quot;Invalid scope for token&quot;.
-        If there is a JWTError, then we also raise an HTTPException with status code 401 (Unauthorized) and detail message &quot;Could not validate credentials&quot;.
-
-        :param self: Represent the instance of a class
-        :param refresh_token: str: Pass the refresh token to the function
-        :return: The email of the user who has sent the refresh token
-        """
-        try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload["scope"] == "refresh_token":
-                email = payload["sub"]
-                return email
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid scope for token")
-        except JWTError:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
-
-    async def get_current_user(self, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-
-        """
-        The get_current_user function is a dependency that will be used in the
-            protected endpoints. It takes a token as an argument and returns the user
-            if it's valid, otherwise raises an HTTPException with status code 401.
-
-        :param self: Access the class attributes
-        :param token: str: Pass the token that is sent in the request
-        :param db: Session: Get a database session
-        :return: The user object of the current user
-        :doc-author: Trelent
-        """
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+password_hasher = PasswordHasher(time_cost=1, memory_cost=46 * 1024, parallelism=1)
+legacy_pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+hash_limiter: CapacityLimiter | None = None
+token_cache = TTLCache(maxsize=10_000, ttl=60)
+SECRET_KEY = settings.secret_key
+ALGORITHM = settings.algorithm
+SIGNING_KEY = jwk.construct(SECRET_KEY, ALGORITHM)
+ACCESS_TOKEN_LIFETIME = 15 * 60
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
+
+
+def verify_password(plain_password, hashed_password):
+
+    """
+    The verify_password function takes a plain-text password and a hashed password as arguments.
+    It then uses the argon2 password_hasher to verify that the plain-text password matches the hashed
+    password. Hashes created with bcrypt before the switch to argon2 are verified by legacy_pwd_context.
+
+    :param plain_password: Store the password that is entered by the user
+    :param hashed_password: Compare the hashed password stored in the database to a plain text password
+    :return: True or false
+    """
+    if not hashed_password.startswith("$argon2"):
+        return legacy_pwd_context.verify(plain_password, hashed_password)
+    try:
+        return password_hasher.verify(hashed_password, plain_password)
+    except (VerificationError, InvalidHashError):
+        return False
+
+
+def get_password_hash(password: str):
+
+    """
+    The get_password_hash function takes a password as an argument and returns the hashed version of that password.
+    The hash is generated using the password_hasher object's hash method, which uses argon2id to generate a secure hash.
+
+    :param password: str: Pass in the password that is to be hashed
+    :return: A hashed password
+    """
+    return password_hasher.hash(password)
+
+
+def get_hash_limiter() -> CapacityLimiter:
+
+    """
+    The get_hash_limiter function returns the limiter that allows one password hash per CPU core at a time.
+    It is created on first use, inside the running event loop, because older anyio releases cannot
+    build a CapacityLimiter at import time.
+
+    :return: The shared CapacityLimiter
+    """
+    global hash_limiter
+    if hash_limiter is None:
+        hash_limiter = CapacityLimiter(os.cpu_count() or 1)
+    return hash_limiter
+
+
+async def averify_password(plain_password: str, hashed_password: str):
+
+    """
+    The averify_password function runs verify_password in a worker thread, so the event loop keeps serving
+    other requests while the hash is computed. At most one hash per CPU core runs at a time.
+
+    :param plain_password: str: Store the password that is entered by the user
+    :param hashed_password: str: Compare the hashed password stored in the database to a plain text password
+    :return: True or false
+    """
+    return await to_thread.run_sync(verify_password, plain_password, hashed_password,
+                                    limiter=get_hash_limiter())
+
+
+async def aget_password_hash(password: str):
+
+    """
+    The aget_password_hash function runs get_password_hash in a worker thread, so the event loop keeps serving
+    other requests while the hash is computed. At most one hash per CPU core runs at a time.
+
+    :param password: str: Pass in the password that is to be hashed
+    :return: A hashed password
+    """
+    return await to_thread.run_sync(get_password_hash, password, limiter=get_hash_limiter())
+
+
+def encode_token(claims: dict) -> str:
+
+    """
+    The encode_token function signs the claims with our key and returns the compact JWT.
+    The claims are serialized with orjson and handed to jws.sign as bytes, which skips
+    the stdlib json.dumps call inside jwt.encode. All claims are plain str/int values.
+
+    :param claims: dict: The claims to put into the token
+    :return: An encoded token
+    """
+    return jws.sign(orjson.dumps(claims), SIGNING_KEY, algorithm=ALGORITHM)
+
+
+async def create_access_token(data: dict, expires_delta: Optional[float] = None):
 
+    """
+    The create_access_token function creates a new access token for the user.
+        Args:
+            data (dict): A dictionary containing the user's information.
+            expires_delta (Optional[float]): The time in seconds until the token expires. Defaults to 15 minutes if not specified.
+        The default lifetime gets a random jitter of up to 10% either way, so tokens issued in a burst
+        do not all expire and hit /refresh_token at the same moment.
+
+    :param data: dict: Pass the data that will be encoded into the access token
+    :param expires_delta: Optional[float]: Set the expiration time of the token
+    :return: A jwt token
+    """
+    to_encode = data.copy()
+    now = int(time.time())
+    if expires_delta:
+        expire = now + int(expires_delta)
+    else:
+        jitter = ACCESS_TOKEN_LIFETIME // 10
+        expire = now + ACCESS_TOKEN_LIFETIME + secrets.randbelow(2 * jitter + 1) - jitter
+    to_encode.update({"iat": now, "exp": expire, "scope": "access_token"})
+    encoded_access_token = encode_token(to_encode)
+    return encoded_access_token
+
+
+async def create_refresh_token(data: dict, expires_delta: Optional[float] = None):
+
+    """
+    The create_refresh_token function creates a refresh token for the user.
+        Args:
+            data (dict): A dictionary containing the user's id and username.
+            expires_delta (Optional[float]): The number of seconds until the refresh token expires. Defaults to None, which sets it to 7 days from now.
+
+    :param data: dict: Pass the user's id and username to the function
+    :param expires_delta: Optional[float]: Set the expiration time of the refresh token
+    :return: An encoded refresh token
+    """
+    to_encode = data.copy()
+    now = int(time.time())
+    expire = now + (int(expires_delta) if expires_delta else 7 * 24 * 60 * 60)
+    to_encode.update({"iat": now, "exp": expire, "scope": "refresh_token"})
+    encoded_refresh_token = encode_token(to_encode)
+    return encoded_refresh_token
+
+
+async def decode_refresh_token(refresh_token: str):
+
+    """
+    The decode_refresh_token function takes a refresh token and decodes it using the SECRET_KEY.
+    If the scope is &quot;refresh_token&quot;, then we return the email address of that user. If not, we raise an HTTPException with status code 401 (Unauthorized) and detail message &quot;Invalid scope for token&quot;.
+    If there is a JWTError, then we also raise an HTTPException with status code 401 (Unauthorized) and detail message &quot;Could not validate credentials&quot;.
+
+    :param refresh_token: str: Pass the refresh token to the function
+    :return: The email of the user who has sent the refresh token
+    """
+    try:
+        payload = jwt.decode(refresh_token, SIGNING_KEY, algorithms=[ALGORITHM])
+        if payload["scope"] == "refresh_token":
+            email = payload["sub"]
+            return email
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid scope for token")
+    except JWTError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
+
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+
+    """
+    The get_current_user function is a dependency that will be used in the
+        protected endpoints. It takes a token as an argument and returns the user
+        if it's valid, otherwise raises an HTTPException with status code 401.
+        Decoded access tokens are kept in memory for up to a minute, so repeated
+        requests with the same token skip the signature check.
+
+    :param token: str: Pass the token that is sent in the request
+    :param db: AsyncSession: Get a database session
+    :return: The user object of the current user
+    :doc-author: Trelent
+    """
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    key = hashlib.sha256(token.encode()).digest()
+    cached = token_cache.get(key)
+    if cached and cached[1] > time.time():
+        email = cached[0]
+    else:
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
             if payload["scope"] == "access_token":
                 email = payload["sub"]
                 if email is None:
@@ -138,47 +219,60 @@ class Auth:
                 raise credentials_exception
         except JWTError:
             raise credentials_exception
+        token_cache[key] = (email, payload["exp"])
 
-        user = await repository_users.get_user_by_email(email, db)
-        if user is None:
-            raise credentials_exception
-        return user
-
-    def create_email_token(self, data: dict):
-
-        """
-        The create_email_token function takes in a dictionary of data and returns an encoded token.
-        The function first creates a copy of the data dictionary, then adds two keys to it: iat (issued at) and exp (expiration).
-        It then encodes the new dictionary using JWT with our secret key.
-
-        :param self: Represent the instance of the class
-        :param data: dict: Pass in the data that will be encoded into a token
-        :return: A token that is used to verify the user's email
-        """
-        to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(days=7)
-        to_encode.update({"iat": datetime.utcnow(), "exp": expire})
-        token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
-        return token
-
-    async def get_email_from_token(self, token: str):
-
-        """
-        The get_email_from_token function takes a token as an argument and returns the email address associated with that token.
-        The function uses the jwt library to decode the token, which is then used to return the email address.
-
-        :param self: Represent the instance of the class
-        :param token: str: Pass in the token that is sent to the user's email
-        :return: The email address of the user that is stored in the token
-        """
-        try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            email = payload["sub"]
-            return email
-        except JWTError as e:
-            print(e)
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                                detail="Invalid token for email verification")
+    user = await repository_users.get_user_by_email(email, db)
+    if user is None:
+        raise credentials_exception
+    return user
+
+
+def create_email_token(data: dict):
+
+    """
+    The create_email_token function takes in a dictionary of data and returns an encoded token.
+    The function first creates a copy of the data dictionary, then adds two keys to it: iat (issued at) and exp (expiration).
+    It then encodes the new dictionary using JWT with our secret key.
+
+    :param data: dict: Pass in the data that will be encoded into a token
+    :return: A token that is used to verify the user's email
+    """
+    to_encode = data.copy()
+    now = int(time.time())
+    to_encode.update({"iat": now, "exp": now + 7 * 24 * 60 * 60})
+    token = encode_token(to_encode)
+    return token
+
+
+async def get_email_from_token(token: str):
+
+    """
+    The get_email_from_token function takes a token as an argument and returns the email address associated with that token.
+    The function uses the jwt library to decode the token, which is then used to return the email address.
+
+    :param token: str: Pass in the token that is sent to the user's email
+    :return: The email address of the user that is stored in the token
+    """
+    try:
+        payload = jwt.decode(token, SIGNING_KEY, algorithms=[ALGORITHM])
+        email = payload["sub"]
+        return email
+    except JWTError as e:
+        logger.warning("Invalid email verification token: %s", e)
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                            detail="Invalid token for email verification")
 
 
-auth_service = Auth()
+auth_service = SimpleNamespace(
+    verify_password=verify_password,
+    get_password_hash=get_password_hash,
+    averify_password=averify_password,
+    aget_password_hash=aget_password_hash,
+    encode_token=encode_token,
+    create_access_token=create_access_token,
+    create_refresh_token=create_refresh_token,
+    decode_refresh_token=decode_refresh_token,
+    get_current_user=get_current_user,
+    create_email_token=create_email_token,
+    get_email_from_token=get_email_from_token,
+)
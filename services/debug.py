@@ -0,0 +1,53 @@
+import logging
+from contextvars import ContextVar
+
+from fastapi import FastAPI, Request
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+query_counter: ContextVar[list[int] | None] = ContextVar("query_counter", default=None)
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+
+    """
+    The count_query function is a before_cursor_execute listener that increments the query counter
+    of the request being handled.
+
+    :param conn: The connection that executes the statement
+    :param cursor: The DBAPI cursor
+    :param statement: str: The SQL statement
+    :param parameters: The parameters of the statement
+    :param context: The execution context
+    :param executemany: bool: Whether executemany is used
+    """
+    counter = query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def install_query_counter(app: FastAPI, engine: AsyncEngine) -> None:
+
+    """
+    The install_query_counter function counts the SQL statements executed for every request.
+        The count is logged and returned in the X-SQL-Count response header, which makes accidental
+        N+1 queries visible during development.
+
+    :param app: FastAPI: The application instance
+    :param engine: AsyncEngine: The engine whose statements are counted
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+    @app.middleware("http")
+    async def sql_count_header(request: Request, call_next):
+        counter = [0]
+        token = query_counter.set(counter)
+        try:
+            response = await call_next(request)
+        finally:
+            query_counter.reset(token)
+        logger.info("%s %s executed %d SQL statements", request.method, request.url.path, counter[0])
+        response.headers["X-SQL-Count"] = str(counter[0])
+        return response
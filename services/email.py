@@ -1,7 +1,11 @@
+import asyncio
+import logging
+from email.message import EmailMessage
+from email.utils import formataddr
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from aiosmtplib import SMTP, SMTPException, SMTPServerDisconnected
+from fastapi_mail import ConnectionConfig
 
 from conf.config import settings
 from services.auth import auth_service
@@ -20,6 +24,139 @@ conf = ConnectionConfig(
     TEMPLATE_FOLDER=Path(__file__).parent / "templates",
 )
 
+logger = logging.getLogger(__name__)
+email_template = conf.template_engine().get_template("email_template.html")
+
+
+class SMTPPool:
+    def __init__(self, config: ConnectionConfig, size: int):
+
+        """
+        The __init__ function sets up a pool of at most size SMTP connections built from the mail config.
+        Connections are opened lazily on first use and kept open between emails.
+
+        :param self: Represent the instance of the class
+        :param config: ConnectionConfig: The mail server settings
+        :param size: int: Maximum number of open SMTP connections
+        """
+        self.config = config
+        self.size = size
+        self.connections = None
+
+    async def connect(self) -> SMTP:
+
+        """
+        The connect function opens a new SMTP connection, runs STARTTLS and logs in according to the mail config.
+        If the login fails, the connection is closed before the error is raised.
+
+        :param self: Represent the instance of the class
+        :return: A connected SMTP client
+        """
+        smtp = SMTP(hostname=self.config.MAIL_SERVER,
+                    port=self.config.MAIL_PORT,
+                    use_tls=self.config.MAIL_SSL_TLS,
+                    start_tls=self.config.MAIL_STARTTLS,
+                    validate_certs=self.config.VALIDATE_CERTS)
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            try:
+                await smtp.login(self.config.MAIL_USERNAME, self.config.MAIL_PASSWORD.get_secret_value())
+            except BaseException:
+                smtp.close()
+                raise
+        return smtp
+
+    @staticmethod
+    def discard(smtp: SMTP | None) -> None:
+
+        """
+        The discard function closes a connection that will not be returned to the pool.
+
+        :param smtp: SMTP | None: The connection to close, None is ignored
+        """
+        if smtp is not None:
+            smtp.close()
+
+    async def reset(self, smtp: SMTP | None) -> SMTP | None:
+
+        """
+        The reset function clears the mail transaction left behind by a failed send with RSET,
+        so the connection can be reused. If RSET itself fails, the connection is discarded.
+
+        :param self: Represent the instance of the class
+        :param smtp: SMTP | None: The connection to reset
+        :return: The connection if it is still usable, otherwise None
+        """
+        if smtp is None:
+            return None
+        try:
+            await smtp.rset()
+            return smtp
+        except (SMTPException, OSError):
+            self.discard(smtp)
+            return None
+
+    async def send(self, message: EmailMessage) -> None:
+
+        """
+        The send function sends a message over a pooled connection, so the TCP and TLS handshakes are paid
+        once per connection instead of once per email. A connection closed by the server is reopened once.
+        Only network errors drop the connection; after an error response such as refused recipients
+        the connection is reset and kept in the pool.
+
+        :param self: Represent the instance of the class
+        :param message: EmailMessage: The message to send
+        """
+        if self.connections is None:
+            self.connections = asyncio.Queue()
+            for _ in range(self.size):
+                self.connections.put_nowait(None)
+        connections = self.connections
+
+        smtp = await connections.get()
+        try:
+            if smtp is None or not smtp.is_connected:
+                self.discard(smtp)
+                smtp = None
+                smtp = await self.connect()
+            try:
+                await smtp.send_message(message)
+            except SMTPServerDisconnected:
+                self.discard(smtp)
+                smtp = None
+                smtp = await self.connect()
+                await smtp.send_message(message)
+        except (OSError, asyncio.CancelledError):
+            self.discard(smtp)
+            smtp = None
+            raise
+        except Exception:
+            smtp = await self.reset(smtp)
+            raise
+        finally:
+            connections.put_nowait(smtp)
+
+    async def close(self) -> None:
+
+        """
+        The close function sends QUIT on every idle connection and empties the pool.
+
+        :param self: Represent the instance of the class
+        """
+        if self.connections is None:
+            return
+        while not self.connections.empty():
+            smtp = self.connections.get_nowait()
+            if smtp is not None and smtp.is_connected:
+                try:
+                    await smtp.quit()
+                except (SMTPException, OSError):
+                    smtp.close()
+        self.connections = None
+
+
+smtp_pool = SMTPPool(conf, size=4)
+
 
 async def send_email(email: str, username: str, host: str):
 
@@ -28,7 +165,7 @@ async def send_email(email: str, username: str, host: str):
         The function takes in three parameters:
             - email: the user's email address, which is used as a unique identifier for each user.
             - username: the username of the new account being created. This is used in personalizing emails sent out by
-                        FastMail and also displayed on our website when users log into their accounts.
+                        the application and also displayed on our website when users log into their accounts.
             - host: this parameter specifies what domain name we are using for our website (e.g., localhost). It is needed
                     because we need
 
@@ -39,14 +176,13 @@ async def send_email(email: str, username: str, host: str):
     """
     try:
         token_verification = auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email ",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html
-        )
-
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="email_template.html")
-    except ConnectionErrors as err:
-        print(err)
+        message = EmailMessage()
+        message["Subject"] = "Confirm your email "
+        message["From"] = formataddr((conf.MAIL_FROM_NAME, conf.MAIL_FROM))
+        message["To"] = email
+        message.set_content(email_template.render(host=host, username=username, token=token_verification),
+                            subtype="html")
+
+        await smtp_pool.send(message)
+    except (SMTPException, OSError) as err:
+        logger.error("Failed to send confirmation email to %s: %s", email, err)
@@ -0,0 +1,56 @@
+import time
+from secrets import token_hex
+
+from fastapi import HTTPException, status, Depends
+
+from database.cache import redis_client
+from database.models import User
+from services.auth import auth_service
+
+SLIDING_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+redis.call("ZREMRANGEBYSCORE", key, "-inf", now - window)
+if redis.call("ZCARD", key) < limit then
+    redis.call("ZADD", key, now, ARGV[4])
+    redis.call("PEXPIRE", key, window)
+    return 1
+end
+return 0
+"""
+
+sliding_window = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+
+
+class UserRateLimiter:
+    def __init__(self, times: int, seconds: int, scope: str):
+
+        """
+        The __init__ function sets up a limiter that allows a user to call a route at most times per seconds.
+
+        :param self: Represent the instance of the class
+        :param times: int: Maximum number of calls in the window
+        :param seconds: int: Length of the sliding window in seconds
+        :param scope: str: Name of the limited group of routes, used in the Redis key
+        """
+        self.times = times
+        self.milliseconds = seconds * 1000
+        self.scope = scope
+
+    async def __call__(self, current_user: User = Depends(auth_service.get_current_user)):
+
+        """
+        The __call__ function is a dependency that counts the current user's calls in a Redis sorted set.
+            Pruning, counting and recording the call run in a single Lua script, so concurrent requests
+            cannot race each other and only one round-trip to Redis is made.
+
+        :param self: Represent the instance of the class
+        :param current_user: User: Get the user object of the currently logged-in user
+        """
+        key = f"rl:{current_user.id}:{self.scope}"
+        now = int(time.time() * 1000)
+        allowed = await sliding_window(keys=[key], args=[self.times, self.milliseconds, now, token_hex(4)])
+        if not allowed:
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too Many Requests")
@@ -1,21 +1,32 @@
+import os
+from unittest.mock import AsyncMock
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 
 from main import app
 from database.models import Base, User
 from database.db import get_db
+from database.cache import redis_client
 from services.auth import auth_service
 
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
+TEST_DB_FILE = f"./test{os.environ.get('PYTEST_XDIST_WORKER', '')}.db"
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_FILE}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DB_FILE}", poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False,
+                                              bind=async_engine)
+
 @pytest.fixture(scope="function", autouse=True)
 def session():
     Base.metadata.drop_all(bind=engine)
@@ -27,13 +38,19 @@ def session():
     finally:
         db.close()
 
+@pytest.fixture(scope="function", autouse=True)
+def redis_mock(monkeypatch):
+    monkeypatch.setattr(redis_client, "get", AsyncMock(return_value=None))
+    monkeypatch.setattr(redis_client, "setex", AsyncMock())
+    monkeypatch.setattr(redis_client, "delete", AsyncMock())
+    return redis_client
+
+
 @pytest.fixture(scope="function")
 def client(session):
-    def override_get_db():
-        try:
-            yield session
-        finally:
-            session.close()
+    async def override_get_db():
+        async with TestingAsyncSessionLocal() as db:
+            yield db
 
     app.dependency_overrides[get_db] = override_get_db
 
@@ -67,3 +67,13 @@ def test_login_wrong_email(client, user):
     assert response.status_code == 401, response.text
     data = response.json()
     assert data["detail"] == "Invalid email"
+
+
+def test_request_email_unknown_user(client):
+    response = client.post(
+        "/api/auth/request_email",
+        json={"email": "unknown@example.com"},
+    )
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["message"] == "Check your email for confirmation."
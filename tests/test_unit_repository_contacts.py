@@ -1,8 +1,8 @@
 import unittest
-from unittest.mock import MagicMock
+from datetime import datetime
+from unittest.mock import MagicMock, patch
 
-from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import Contact, User
 from schemas import ContactBase
@@ -12,16 +12,19 @@ from repository.contacts import (
     create_contact,
     remove_contact,
     update_contact,
-    check_contact
+    birthdays_in_7_days,
+    CONTACTS_BY_FILTERS,
+    CONTACT_UPDATE,
+    CONTACT_DELETE
 )
 
 
 class TestRepositoryContacts(unittest.IsolatedAsyncioTestCase):
 
-    def setUp(self):
-        self.session = MagicMock(spec=Session)
-        self.user = User(id=1)
-        self.contact_base = ContactBase(
+    @classmethod
+    def setUpClass(cls):
+        cls.session_template = MagicMock(spec=AsyncSession)
+        cls.contact_base_template = ContactBase(
             first_name="test name",
             last_name="test last name",
             email="test1@example.com",
@@ -30,12 +33,18 @@ class TestRepositoryContacts(unittest.IsolatedAsyncioTestCase):
             additional_data="test friend"
         )
 
+    def setUp(self):
+        self.session = self.session_template
+        self.session.reset_mock(return_value=True, side_effect=True)
+        self.session.execute.return_value = MagicMock()
+        self.user = User(id=1)
+        self.contact_base = self.contact_base_template
+
     async def test_get_contacts_without_filters(self):
-        contacts = [Contact(), Contact(), Contact()]
+        contacts = [{"id": 1}, {"id": 2}, {"id": 3}]
         skip = 0
         limit = 10
-        self.session.query(Contact).filter(Contact.user_id == self.user.id). \
-            offset(skip).limit(limit).all.return_value = contacts
+        self.session.execute.return_value.mappings().all.return_value = contacts
 
         result = await get_contacts(first_name=None, last_name=None, email=None, user=self.user,
                                     db=self.session, skip=skip,
@@ -43,18 +52,33 @@ class TestRepositoryContacts(unittest.IsolatedAsyncioTestCase):
 
         self.assertEqual(result, contacts)
 
+    async def test_get_contacts_with_filters(self):
+        contacts = [{"id": 1}]
+        self.session.execute.return_value.mappings().all.return_value = contacts
+
+        result = await get_contacts(first_name="test name", last_name=None, email="test1@example.com",
+                                    user=self.user, db=self.session, skip=0, limit=10)
+
+        self.assertEqual(result, contacts)
+        self.session.execute.assert_awaited_once_with(
+            CONTACTS_BY_FILTERS[(True, False, True)],
+            {"user_id": self.user.id, "skip": 0, "limit": 10, "first_name": "test name", "email": "test1@example.com"}
+        )
+
     async def test_get_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.session.execute.return_value.scalars().first.return_value = contact
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, contact)
 
     async def test_get_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.session.execute.return_value.scalars().first.return_value = None
         result = await get_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
     async def test_create_contact(self):
+        contact = Contact(**self.contact_base.dict(), user_id=self.user.id)
+        self.session.execute.return_value.scalars().first.return_value = contact
         result = await create_contact(body=self.contact_base, user=self.user, db=self.session)
         self.assertEqual(result.first_name, self.contact_base.first_name)
         self.assertEqual(result.last_name, self.contact_base.last_name)
@@ -64,48 +88,58 @@ class TestRepositoryContacts(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result.additional_data, self.contact_base.additional_data)
         self.assertTrue(hasattr(result, "id"))
 
-    async def test_check_contact_with_email(self):
-        contact = self.session.query().filter(
-            and_(Contact.user_id == self.user.id, Contact.email == "test1@example.com")).first()
-        result = await check_contact(email="test1@example.com", phone=None, user=self.user, db=self.session)
-        self.assertEqual(result, contact)
-
-    async def test_check_contact_with_phone(self):
-        contact = self.session.query().filter(
-            and_(Contact.user_id == self.user.id, Contact.phone == "12345678963")).first()
-        result = await check_contact(email=None, phone="12345678963", user=self.user, db=self.session)
-        self.assertEqual(result, contact)
-
-    async def test_check_contact_with_email_and_phone(self):
-        contact = self.session.query().filter(
-            and_(Contact.user_id == self.user.id,
-                 or_(Contact.email == "test1@example.com", Contact.phone == "12345678963"))).first()
-        result = await check_contact(email="test1@example.com", phone="12345678963", user=self.user, db=self.session)
-        self.assertEqual(result, contact)
+    async def test_create_contact_exists(self):
+        self.session.execute.return_value.scalars().first.return_value = None
+        result = await create_contact(body=self.contact_base, user=self.user, db=self.session)
+        self.assertIsNone(result)
 
     async def test_update_contact_found(self):
-        self.session.query().filter().first.return_value = self.contact_base
+        self.session.execute.return_value.scalars().first.return_value = self.contact_base
         self.session.commit.return_value = None
         result = await update_contact(contact_id=1, body=self.contact_base, user=self.user, db=self.session)
         self.assertEqual(result, self.contact_base)
+        statement, params = self.session.execute.call_args.args
+        self.assertIs(statement, CONTACT_UPDATE)
+        self.assertEqual(params["contact_id"], 1)
+        self.assertEqual(params["owner_id"], self.user.id)
+        self.assertEqual(params["email"], self.contact_base.email)
 
     async def test_update_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.session.execute.return_value.scalars().first.return_value = None
         self.session.commit.return_value = None
         result = await update_contact(contact_id=1, body=self.contact_base, user=self.user, db=self.session)
         self.assertIsNone(result)
 
     async def test_remove_contact_found(self):
         contact = Contact()
-        self.session.query().filter().first.return_value = contact
+        self.session.execute.return_value.scalars().first.return_value = contact
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertEqual(result, contact)
+        self.session.execute.assert_called_once_with(CONTACT_DELETE, {"contact_id": 1, "user_id": self.user.id})
 
     async def test_remove_contact_not_found(self):
-        self.session.query().filter().first.return_value = None
+        self.session.execute.return_value.scalars().first.return_value = None
         result = await remove_contact(contact_id=1, user=self.user, db=self.session)
         self.assertIsNone(result)
 
+    async def test_birthdays_in_7_days(self):
+        contacts = [Contact(), Contact()]
+        self.session.execute.return_value.scalars().all.return_value = contacts
+        with patch("repository.contacts.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime(2025, 2, 25)
+            result = await birthdays_in_7_days(skip=0, limit=10, user=self.user, db=self.session)
+        self.assertEqual(result, contacts)
+        pairs = self.session.execute.call_args.args[1]["pairs"]
+        self.assertEqual(pairs[:8], [(2, 25), (2, 26), (2, 27), (2, 28), (3, 1), (3, 2), (3, 3), (3, 4)])
+        self.assertIn((2, 29), pairs)
+        self.assertNotIn((3, 5), pairs)
+
+        with patch("repository.contacts.datetime") as mock_datetime:
+            mock_datetime.now.return_value = datetime(2024, 2, 25)
+            await birthdays_in_7_days(skip=0, limit=10, user=self.user, db=self.session)
+        pairs = self.session.execute.call_args.args[1]["pairs"]
+        self.assertEqual(pairs, [(2, 25), (2, 26), (2, 27), (2, 28), (2, 29), (3, 1), (3, 2), (3, 3)])
+
 
 if __name__ == '__main__':
     unittest.main()
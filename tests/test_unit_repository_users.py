@@ -1,8 +1,10 @@
+import json
 import unittest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, AsyncMock, patch
 
+from redis.exceptions import RedisError
 from sqlalchemy import and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from database.models import Contact, User
 from schemas import ContactBase, UserModel
@@ -11,24 +13,71 @@ from repository.users import (
     create_user,
     update_token,
     confirm_email,
-    update_avatar
+    update_avatar,
+    user_to_dict
 )
 
 
 class TestRepositoryUsers(unittest.IsolatedAsyncioTestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        cls.session_template = MagicMock(spec=AsyncSession)
+
     def setUp(self):
-        self.session = MagicMock(spec=Session)
+        self.session = self.session_template
+        self.session.reset_mock(return_value=True, side_effect=True)
+        self.session.execute.return_value = MagicMock()
         self.user = User(id=1)
+        patcher = patch("repository.users.redis_client", new=AsyncMock())
+        self.redis = patcher.start()
+        self.redis.get.return_value = None
+        self.addCleanup(patcher.stop)
 
     async def test_get_user_by_email_found(self):
         user = User()
-        self.session.query().filter(User.email == "test@test.com").first.return_value = user
+        self.session.execute.return_value.scalars().first.return_value = user
+        result = await get_user_by_email(email="test@test.com", db=self.session)
+        self.assertEqual(result, user)
+
+    async def test_get_user_by_email_cached(self):
+        user = User(id=1, username="test name", email="test@test.com", password="testpass", created_at=None,
+                    avatar=None, refresh_token=None, confirmed=True)
+        self.redis.get.return_value = json.dumps(user_to_dict(user))
+        self.session.merge.side_effect = lambda obj, load: obj
+        result = await get_user_by_email(email="test@test.com", db=self.session)
+        self.assertEqual(result.email, user.email)
+        self.assertTrue(result.confirmed)
+        self.session.execute.assert_not_called()
+
+    async def test_get_user_by_email_cache_skips_credentials(self):
+        user = User(id=1, username="test name", email="test@test.com", password="testpass", created_at=None,
+                    avatar=None, refresh_token="token", confirmed=True)
+        self.session.execute.return_value.scalars().first.return_value = user
+        await get_user_by_email(email="test@test.com", db=self.session)
+        cached = json.loads(self.redis.setex.call_args.args[2])
+        self.assertEqual(cached["email"], user.email)
+        self.assertNotIn("password", cached)
+        self.assertNotIn("refresh_token", cached)
+
+    async def test_get_user_by_email_without_cache(self):
+        user = User()
+        self.session.execute.return_value.scalars().first.return_value = user
+        result = await get_user_by_email(email="test@test.com", db=self.session, use_cache=False)
+        self.assertEqual(result, user)
+        self.redis.get.assert_not_called()
+        self.redis.setex.assert_not_called()
+
+    async def test_get_user_by_email_redis_down(self):
+        user = User()
+        self.redis.get.side_effect = RedisError
+        self.redis.setex.side_effect = RedisError
+        self.session.execute.return_value.scalars().first.return_value = user
         result = await get_user_by_email(email="test@test.com", db=self.session)
         self.assertEqual(result, user)
 
     async def test_get_user_by_email_not_found(self):
-        self.session.query().filter(User.email == "test@test.com").first.return_value = None
+        self.session.execute.return_value.scalars().first.return_value = None
         result = await get_user_by_email(email="test@test.com", db=self.session)
         self.assertIsNone(result)
 
@@ -38,11 +87,11 @@ class TestRepositoryUsers(unittest.IsolatedAsyncioTestCase):
             email="test@test.com",
             password="testpass"
         )
-        self.session.query().filter().all.return_value = user
         result = await create_user(body=user, db=self.session)
         self.assertEqual(result.username, user.username)
         self.assertEqual(result.email, user.email)
         self.assertEqual(result.password, user.password)
+        self.assertEqual(result.avatar, "https://www.gravatar.com/avatar/b642b4217b34b1e8d3bd915fc65c4452")
         self.assertTrue(hasattr(result, "id"))
 
 
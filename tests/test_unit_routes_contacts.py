@@ -0,0 +1,90 @@
+import json
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from fastapi import HTTPException
+from redis.exceptions import RedisError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import User
+from schemas import ContactBase
+from routes.contacts import read_contacts, update_contact, invalidate_contacts_cache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def setex(self, key, ttl, value):
+        self.data[key] = value
+
+    async def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+class TestContactsCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.session = MagicMock(spec=AsyncSession)
+        self.user = User(id=1)
+        self.contact = {"id": 1, "first_name": "first", "last_name": "last", "email": "test@test.com",
+                        "phone": "1234567", "date_of_birth": "2000-01-01", "additional_data": "data"}
+        self.redis = FakeRedis()
+        redis_patcher = patch("routes.contacts.redis_client", new=self.redis)
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+        repository_patcher = patch("routes.contacts.repository_contacts.get_contacts",
+                                   new=AsyncMock(return_value=[self.contact]))
+        self.get_contacts = repository_patcher.start()
+        self.addCleanup(repository_patcher.stop)
+
+    async def read(self):
+        return await read_contacts(first_name=None, last_name=None, email=None, skip=0, limit=100,
+                                   db=self.session, current_user=self.user)
+
+    async def test_read_contacts_miss(self):
+        response = await self.read()
+        self.assertEqual(json.loads(response.body), [self.contact])
+        self.assertIn("contacts:1:0:0:100", self.redis.data)
+        self.get_contacts.assert_awaited_once()
+
+    async def test_read_contacts_hit(self):
+        await self.read()
+        response = await self.read()
+        self.assertEqual(json.loads(response.body), [self.contact])
+        self.get_contacts.assert_awaited_once()
+
+    async def test_invalidate_contacts_cache(self):
+        await self.read()
+        await invalidate_contacts_cache(self.user.id)
+        self.contact["first_name"] = "changed"
+        response = await self.read()
+        self.assertEqual(json.loads(response.body)[0]["first_name"], "changed")
+        self.assertEqual(self.get_contacts.await_count, 2)
+
+
+    async def test_read_contacts_redis_down(self):
+        self.redis.get = AsyncMock(side_effect=RedisError)
+        self.redis.incr = AsyncMock(side_effect=RedisError)
+        response = await self.read()
+        self.assertEqual(json.loads(response.body), [self.contact])
+        await invalidate_contacts_cache(self.user.id)
+
+
+    async def test_update_contact_conflict(self):
+        body = ContactBase(**self.contact)
+        with patch("routes.contacts.repository_contacts.update_contact",
+                   new=AsyncMock(side_effect=IntegrityError("UPDATE", {}, Exception()))):
+            with self.assertRaises(HTTPException) as context:
+                await update_contact(body=body, contact_id=1, db=self.session, current_user=self.user)
+        self.assertEqual(context.exception.status_code, 409)
+        self.assertNotIn("contacts:1:gen", self.redis.data)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import hashlib
+import time
+import unittest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from fastapi import HTTPException
+from jose import jwt
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database.models import User
+from services.auth import (
+    verify_password,
+    get_password_hash,
+    create_access_token,
+    create_refresh_token,
+    get_current_user,
+    token_cache
+)
+
+BCRYPT_HASH = "$2b$04$FQo6r2k1stN1zvgeNlQZV.9ActizK0x54U7nCY0TirxfGkqFuBs.S"
+PASSLIB_ARGON2_HASH = "$argon2id$v=19$m=47104,t=1,p=1$1JrT2ltrbU1JaW1NKSWEEA$epffMKz2fQGFmTYyeVBoL9dC7UM+hJCEubv/wYMr+0k"
+
+
+class TestPasswordHashing(unittest.TestCase):
+
+    def test_verify_password(self):
+        hashed = get_password_hash("testpass")
+        self.assertTrue(hashed.startswith("$argon2id$"))
+        self.assertTrue(verify_password("testpass", hashed))
+        self.assertFalse(verify_password("wrongpass", hashed))
+
+    def test_verify_legacy_bcrypt_password(self):
+        self.assertTrue(verify_password("testpass", BCRYPT_HASH))
+        self.assertFalse(verify_password("wrongpass", BCRYPT_HASH))
+
+    def test_verify_passlib_argon2_password(self):
+        self.assertTrue(verify_password("testpass", PASSLIB_ARGON2_HASH))
+        self.assertFalse(verify_password("wrongpass", PASSLIB_ARGON2_HASH))
+
+
+class TestGetCurrentUser(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        token_cache.clear()
+        self.addCleanup(token_cache.clear)
+        self.session = MagicMock(spec=AsyncSession)
+        self.user = User(id=1, email="test@test.com")
+        user_patcher = patch("services.auth.repository_users.get_user_by_email",
+                             new=AsyncMock(return_value=self.user))
+        user_patcher.start()
+        self.addCleanup(user_patcher.stop)
+        decode_patcher = patch("services.auth.jwt.decode", wraps=jwt.decode)
+        self.decode = decode_patcher.start()
+        self.addCleanup(decode_patcher.stop)
+
+    async def test_token_cached(self):
+        token = await create_access_token(data={"sub": self.user.email})
+        self.assertEqual(await get_current_user(token=token, db=self.session), self.user)
+        self.assertEqual(await get_current_user(token=token, db=self.session), self.user)
+        self.decode.assert_called_once()
+
+    async def test_expired_cache_entry_decoded_again(self):
+        with patch("services.auth.time.time", return_value=time.time() - 3600):
+            token = await create_access_token(data={"sub": self.user.email}, expires_delta=60)
+        token_cache[hashlib.sha256(token.encode()).digest()] = (self.user.email, int(time.time()) - 1)
+        with self.assertRaises(HTTPException) as context:
+            await get_current_user(token=token, db=self.session)
+        self.assertEqual(context.exception.status_code, 401)
+        self.decode.assert_called_once()
+
+    async def test_refresh_token_rejected(self):
+        token = await create_refresh_token(data={"sub": self.user.email})
+        for _ in range(2):
+            with self.assertRaises(HTTPException) as context:
+                await get_current_user(token=token, db=self.session)
+            self.assertEqual(context.exception.status_code, 401)
+        self.assertEqual(self.decode.call_count, 2)
+        self.assertEqual(len(token_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
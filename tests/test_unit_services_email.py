@@ -0,0 +1,88 @@
+import unittest
+from email.message import EmailMessage
+from unittest.mock import AsyncMock
+
+from aiosmtplib import SMTPRecipientsRefused, SMTPServerDisconnected
+
+from services.email import SMTPPool, conf
+
+
+class FakeSMTP:
+    def __init__(self, errors=()):
+        self.errors = list(errors)
+        self.is_connected = True
+        self.sent = 0
+        self.reset_count = 0
+        self.closed = False
+        self.quit_called = False
+
+    async def send_message(self, message):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent += 1
+
+    async def rset(self):
+        self.reset_count += 1
+
+    async def quit(self):
+        self.quit_called = True
+        self.is_connected = False
+
+    def close(self):
+        self.closed = True
+        self.is_connected = False
+
+
+class TestSMTPPool(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.pool = SMTPPool(conf, size=1)
+        self.pool.connect = AsyncMock()
+        self.message = EmailMessage()
+
+    async def test_send_reuses_connection(self):
+        smtp = FakeSMTP()
+        self.pool.connect.return_value = smtp
+        await self.pool.send(self.message)
+        await self.pool.send(self.message)
+        self.assertEqual(smtp.sent, 2)
+        self.pool.connect.assert_awaited_once()
+
+    async def test_send_keeps_connection_after_refused_recipients(self):
+        smtp = FakeSMTP(errors=[SMTPRecipientsRefused([])])
+        self.pool.connect.return_value = smtp
+        with self.assertRaises(SMTPRecipientsRefused):
+            await self.pool.send(self.message)
+        await self.pool.send(self.message)
+        self.assertEqual(smtp.reset_count, 1)
+        self.assertFalse(smtp.closed)
+        self.assertEqual(smtp.sent, 1)
+        self.pool.connect.assert_awaited_once()
+
+    async def test_send_reconnects_when_server_disconnected(self):
+        stale, fresh = FakeSMTP(errors=[SMTPServerDisconnected("gone")]), FakeSMTP()
+        self.pool.connect.side_effect = [stale, fresh]
+        await self.pool.send(self.message)
+        self.assertTrue(stale.closed)
+        self.assertEqual(fresh.sent, 1)
+
+    async def test_send_discards_connection_on_network_error(self):
+        broken, fresh = FakeSMTP(errors=[ConnectionResetError()]), FakeSMTP()
+        self.pool.connect.side_effect = [broken, fresh]
+        with self.assertRaises(ConnectionResetError):
+            await self.pool.send(self.message)
+        self.assertTrue(broken.closed)
+        await self.pool.send(self.message)
+        self.assertEqual(fresh.sent, 1)
+
+    async def test_close(self):
+        smtp = FakeSMTP()
+        self.pool.connect.return_value = smtp
+        await self.pool.send(self.message)
+        await self.pool.close()
+        self.assertTrue(smtp.quit_called)
+        self.assertIsNone(self.pool.connections)
+
+
+if __name__ == "__main__":
+    unittest.main()
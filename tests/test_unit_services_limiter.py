@@ -0,0 +1,48 @@
+import unittest
+from unittest.mock import patch
+
+from fakeredis import FakeAsyncRedis
+from fastapi import HTTPException
+
+from database.models import User
+from services.limiter import UserRateLimiter, SLIDING_WINDOW_SCRIPT
+
+
+class TestUserRateLimiter(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = FakeAsyncRedis()
+        script_patcher = patch("services.limiter.sliding_window", new=self.redis.register_script(SLIDING_WINDOW_SCRIPT))
+        script_patcher.start()
+        self.addCleanup(script_patcher.stop)
+        time_patcher = patch("services.limiter.time.time", return_value=1000.0)
+        self.time = time_patcher.start()
+        self.addCleanup(time_patcher.stop)
+        self.limiter = UserRateLimiter(times=1, seconds=10, scope="test")
+        self.user = User(id=1)
+
+    async def asyncTearDown(self):
+        await self.redis.aclose()
+
+    async def test_first_call_allowed(self):
+        await self.limiter(current_user=self.user)
+
+    async def test_second_call_in_window_rejected(self):
+        await self.limiter(current_user=self.user)
+        self.time.return_value = 1005.0
+        with self.assertRaises(HTTPException) as context:
+            await self.limiter(current_user=self.user)
+        self.assertEqual(context.exception.status_code, 429)
+
+    async def test_call_after_window_allowed(self):
+        await self.limiter(current_user=self.user)
+        self.time.return_value = 1010.5
+        await self.limiter(current_user=self.user)
+
+    async def test_limit_is_per_user(self):
+        await self.limiter(current_user=self.user)
+        await self.limiter(current_user=User(id=2))
+
+
+if __name__ == "__main__":
+    unittest.main()